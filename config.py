@@ -14,6 +14,7 @@ class Config:
     DEBUG = True
     REPO_FOLDER = Path('.repo')
     REPO_CACHES = Path('.repo_cache')
+    REMOTE_CHECK_TTL = 30
 
 # - создание настроек
 config = Config()
\ No newline at end of file
@@ -3,15 +3,84 @@
 """
 
 # -- импорт модулей
-import hashlib
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, jsonify, request, send_file
 from config import config
-from utils import get_stats, render_image
+from utils import get_cached_stats, get_stats, is_supported_repo, render_image
 
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False
 
+# -- фоновый сбор статистики
+MAX_JOBS = 1024
+_EXEC = ThreadPoolExecutor(max_workers=max(4, (os.cpu_count() or 1) * 3 // 4))
+# выполняющийся сбор статистики по каждому репозиторию
+_ACTIVE: dict[str, Future] = {}
+# задачи, которые клиент опрашивает по /repo/<job_id>
+_JOBS: "OrderedDict[str, Future]" = OrderedDict()
+_JOB_IDS: dict[str, str] = {}
+_JOBS_LOCK = threading.Lock()
+
+
+def _start_stats(repo: str) -> Future:
+    # для одного репозитория одновременно выполняется не больше одной задачи
+    with _JOBS_LOCK:
+        future = _ACTIVE.get(repo)
+        if future is not None:
+            return future
+        future = _EXEC.submit(get_stats, repo, config)
+        _ACTIVE[repo] = future
+    future.add_done_callback(lambda f: _finish_stats(repo, f))
+    return future
+
+
+def _finish_stats(repo: str, future: Future) -> None:
+    with _JOBS_LOCK:
+        if _ACTIVE.get(repo) is future:
+            del _ACTIVE[repo]
+            _JOB_IDS.pop(repo, None)
+    # фоновые обновления никто не опрашивает, поэтому ошибки логируются здесь
+    error = future.exception()
+    if error is not None:
+        app.logger.exception("stats for %s failed", repo, exc_info=error)
+
+
+def _submit_job(repo: str) -> str:
+    future = _start_stats(repo)
+    with _JOBS_LOCK:
+        job_id = _JOB_IDS.get(repo)
+        if job_id is not None and _JOBS.get(job_id) is future:
+            return job_id
+        job_id = uuid.uuid4().hex
+        _JOBS[job_id] = future
+        if not future.done():
+            _JOB_IDS[repo] = job_id
+        # вытесняются только завершённые задачи, чтобы не потерять опрашиваемые
+        for old_id in [i for i, f in _JOBS.items() if f.done()][:max(0, len(_JOBS) - MAX_JOBS)]:
+            del _JOBS[old_id]
+    return job_id
+
+
+def _job_accepted(job_id: str):
+    return jsonify({"job_id": job_id, "status": f"/repo/{job_id}"}), 202
+
+
+def _image_response(repo: str, stats: dict):
+    img_buffer = render_image(stats)
+    if config.DEBUG:
+        app.logger.debug("stats=%s", stats)
+
+    # буфер отдаётся напрямую, Flask закроет его после отправки ответа
+    return send_file(img_buffer, mimetype='image/png', as_attachment=False,
+                     download_name=f'stats_{zlib.crc32(repo.encode()):08x}.png')
+
+
 # -- коммуникация с пользователем
 @app.route('/repo', methods=['GET'])
 def get_stats_image():
@@ -19,19 +88,32 @@ def get_stats_image():
 
     if not repo:
         return jsonify({"error": "Не указан репозиторий"}), 400
+    if not is_supported_repo(repo):
+        return jsonify({"error": "Некорректный адрес репозитория"}), 400
 
-    stats = get_stats(repo, config)
+    # сохранённая статистика отдаётся сразу, а обновляется в фоне
+    stats = get_cached_stats(repo, config)
     if not stats:
-        return jsonify({"error": "Не удалось собрать статистику"}), 500
+        return _job_accepted(_submit_job(repo))
 
-    img_buffer = render_image(stats)
-    print(stats)
+    _start_stats(repo)
+    return _image_response(repo, stats)
+
+
+@app.route('/repo/<job_id>', methods=['GET'])
+def get_job_image(job_id):
+    with _JOBS_LOCK:
+        future = _JOBS.get(job_id)
+    if future is None:
+        return jsonify({"error": "Задача не найдена"}), 404
+    if not future.done():
+        return _job_accepted(job_id)
 
-    response = make_response(img_buffer.getvalue())
-    response.headers['Content-Type'] = 'image/png'
-    response.headers['Content-Disposition'] = f'inline; filename=stats_{hashlib.md5(repo.encode()).hexdigest()[:8]}.png'
+    stats = None if future.exception() else future.result()
+    if not stats:
+        return jsonify({"error": "Не удалось собрать статистику"}), 500
 
-    return response
+    return _image_response(stats["Репозиторий"], stats)
 
 @app.route('/')
 def index():
@@ -2,14 +2,51 @@
 Главные функции приложения
 """
 
+import functools
+import io
 import json
+import re
+import os
 import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Tuple
+from typing import Iterator, Optional, Dict, Tuple
 from urllib.parse import urlparse
 
 import requests
-
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image, ImageDraw, ImageFont
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Пул для сетевых операций, выполняемых параллельно с запросом к GitHub
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+_REPO_LOCKS: Dict[Path, threading.Lock] = {}
+_REPO_LOCKS_LOCK = threading.Lock()
+CHUNK_SIZE = 1 << 20
+
+# Общая сессия держит TLS-соединение с api.github.com между запросами
+_GH_SESSION = requests.Session()
+_GH_SESSION.headers.update({
+    "Accept": "application/vnd.github.v3+json",
+    "User-Agent": "project-stats/1",
+})
+# повторяются только ошибки соединения: ожидание по Retry-After
+# не ограничено таймаутом запроса и расходует лимит GitHub
+_GH_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8, pool_maxsize=16,
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2,
+                      respect_retry_after_header=False),
+))
 
 
 def _run_bytes(cmd: list[str], cwd: Optional[Path] = None) -> bytes:
@@ -18,84 +55,263 @@ def _run_bytes(cmd: list[str], cwd: Optional[Path] = None) -> bytes:
     return proc.stdout
 
 
+def _run_stream(cmd: list[str], cwd: Optional[Path] = None, sep: bytes = b"\n") -> Iterator[bytes]:
+    proc = subprocess.Popen(cmd, cwd=str(cwd) if cwd else None,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        tail = b""
+        while chunk := proc.stdout.read1(CHUNK_SIZE):
+            *records, tail = (tail + chunk).split(sep)
+            yield from records
+        if tail:
+            yield tail
+    finally:
+        proc.stdout.close()
+        if proc.wait() > 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+_REPO_NAME_RE = re.compile(r"[A-Za-z0-9_.-]+")
+
+
+@functools.lru_cache(maxsize=1024)
 def _repo_parts(repo_url: str) -> Optional[Tuple[str, str]]:
     if not repo_url.startswith("https://github.com/"):
         return None
     parsed = urlparse(repo_url)
-    parts = parsed.path.strip("/").replace(".git", "").split("/")
-    if len(parts) < 2:
+    parts = parsed.path.strip("/").split("/")
+    # сегменты вида "." и ".." позволили бы выйти из каталога с клонами
+    if len(parts) < 2 or any(part in ("", ".", "..") for part in parts):
+        return None
+    owner, name = parts[0], parts[1].removesuffix(".git")
+    if not _REPO_NAME_RE.fullmatch(owner) or not _REPO_NAME_RE.fullmatch(name) or name in (".", ".."):
         return None
-    return parts[0], parts[1]
+    return owner, name
+
+
+def _local_repo_path(repo_url: str, config) -> Path:
+    owner, name = _repo_parts(repo_url)
+    return Path(config.REPO_FOLDER) / f"{owner}__{name}.git"
+
 
+def _git(local_path: Path, *args: str) -> list[str]:
+    # явный --git-dir не даёт git подняться к родительскому репозиторию
+    return ["git", "--git-dir", str(local_path), *args]
 
-def _get_remote_commit(repo_url: str) -> Optional[str]:
+
+def _get_remote_commit(repo_url: str, etag: Optional[str] = None,
+                       cached_sha: Optional[str] = None) -> Optional[Tuple[str, Optional[str]]]:
     parts = _repo_parts(repo_url)
     if parts is None:
         return None
     owner, name = parts
-    resp = requests.get(
+    headers = {}
+    # условный запрос: ответ 304 не расходует лимит запросов GitHub
+    if etag and cached_sha:
+        headers["If-None-Match"] = etag
+    resp = _GH_SESSION.get(
         f"https://api.github.com/repos/{owner}/{name}/commits",
-        headers={"Accept": "application/vnd.github.v3+json"},
+        headers=headers,
         params={"per_page": 1},
         timeout=10,
     )
+    if resp.status_code == 304 and cached_sha:
+        return cached_sha, etag
     if resp.status_code != 200:
         return None
     data = resp.json()
     if not isinstance(data, list) or not data:
         return None
-    return data[0].get("sha")
+    sha = data[0].get("sha")
+    if sha is None:
+        return None
+    return sha, resp.headers.get("ETag")
 
 
 def _clone_or_fetch(repo_url: str, local_path: Path) -> None:
+    with _REPO_LOCKS_LOCK:
+        lock = _REPO_LOCKS.setdefault(local_path, threading.Lock())
+    # git не допускает параллельных fetch в одном репозитории
+    with lock:
+        _clone_or_fetch_locked(repo_url, local_path)
+
+
+def _clone_or_fetch_locked(repo_url: str, local_path: Path) -> None:
+    # рабочая копия не нужна: статистика читается напрямую из объектов git
     if not local_path.exists():
-        _run_bytes(["git", "clone", "--depth", "1", repo_url, str(local_path)])
+        _run_bytes(["git", "clone", "--bare", "--depth", "1", repo_url, str(local_path)])
     else:
-        _run_bytes(["git", "fetch", "origin"], cwd=local_path)
+        _run_bytes(_git(local_path, "fetch", "--depth", "1", "origin", "HEAD"))
+        _run_bytes(_git(local_path, "update-ref", "HEAD", "FETCH_HEAD"))
+        # объекты прежних коммитов удаляются, в клоне остаётся только HEAD
+        _run_bytes(_git(local_path, "gc", "--prune=now", "--quiet"))
 
 
 def _local_commit(local_path: Path) -> str:
-    return _run_bytes(["git", "rev-parse", "HEAD"], cwd=local_path).decode().strip()
+    return _run_bytes(_git(local_path, "rev-parse", "HEAD")).decode().strip()
+
+
+EXCLUDED_DIRS = {
+    ".git", "node_modules", ".venv", "venv", "__pycache__", "dist", "build",
+    ".idea", ".mypy_cache", ".pytest_cache", "target", ".tox"
+}
+
+
+PARALLEL_BLOBS_THRESHOLD = 200
+BLOB_WORKERS = 8
+
 
+def _is_excluded(rel_path: str) -> bool:
+    return any(d in EXCLUDED_DIRS or d.startswith(".") for d in rel_path.split("/")[:-1])
 
-def _repo_size_bytes(path: Path) -> int:
-    total = 0
-    for root, dirs, files in __import__("os").walk(path):
-        if ".git" in dirs:
-            dirs.remove(".git")
-        for f in files:
-            p = Path(root) / f
-            if p.is_file():
-                total += p.stat().st_size
-    return total
 
+def _file_ext(name: str) -> str:
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot > 0 else ""
 
-def _file_counts(path: Path, code_exts: set[str]) -> Tuple[int, int]:
-    total = 0
+
+def _list_tree(local_path: Path, commit: str) -> Iterator[Tuple[str, str, int]]:
+    for record in _run_stream(_git(local_path, "ls-tree", "-r", "-l", "-z", commit), sep=b"\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition(b"\t")
+        mode, obj_type, sha, size = meta.split()
+        # подмодули и символические ссылки не считаются файлами
+        if obj_type != b"blob" or mode == b"120000":
+            continue
+        # имена не в UTF-8 экранируются, чтобы их можно было сохранить в JSON-кэш
+        yield path.decode("utf-8", "backslashreplace"), sha.decode(), int(size)
+
+
+def _write_lines(stream, items: list[str]) -> None:
+    try:
+        for item in items:
+            stream.write(item.encode() + b"\n")
+        stream.close()
+    except BrokenPipeError:
+        # процесс завершился раньше, ошибку обработает читающая сторона
+        pass
+
+
+def _count_blob_lines(local_path: Path, shas: list[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    if not shas:
+        return counts
+    cmd = _git(local_path, "cat-file", "--batch")
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    # запись в отдельном потоке, чтобы не заблокироваться на заполненном канале
+    writer = threading.Thread(target=_write_lines, args=(proc.stdin, shas), daemon=True)
+    writer.start()
+    out = proc.stdout
+    try:
+        for sha in shas:
+            header = out.readline().split()
+            if not header or header[-1] == b"missing":
+                counts[sha] = 0
+                continue
+            remaining = int(header[2])
+            lines = 0
+            last = b"\n"
+            while remaining:
+                chunk = out.read(min(remaining, CHUNK_SIZE))
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+                remaining -= len(chunk)
+                last = chunk
+            # последняя строка без завершающего перевода строки тоже считается
+            if not last.endswith(b"\n"):
+                lines += 1
+            counts[sha] = lines
+            out.read(1)
+    finally:
+        out.close()
+        writer.join()
+        if proc.wait() > 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return counts
+
+
+def _pack_order(local_path: Path, shas: set[str]) -> list[str]:
+    # --unordered перечисляет объекты в порядке их расположения в упаковке
+    cmd = _git(local_path, "cat-file", "--batch-all-objects", "--batch-check=%(objectname)", "--unordered")
+    ordered = [sha for sha in map(bytes.decode, _run_stream(cmd)) if sha in shas]
+    ordered.extend(sorted(shas.difference(ordered)))
+    return ordered
+
+
+def _count_code_blobs(local_path: Path, shas: set[str]) -> Dict[str, int]:
+    # перечисление всех объектов оправдано только для большого пересчёта
+    if len(shas) < PARALLEL_BLOBS_THRESHOLD:
+        return _count_blob_lines(local_path, sorted(shas))
+    ordered = _pack_order(local_path, shas)
+    # каждый процесс cat-file читает свой непрерывный участок упаковки
+    workers = min(BLOB_WORKERS, os.cpu_count() or 1)
+    step = -(-len(ordered) // workers)
+    parts = [ordered[i:i + step] for i in range(0, len(ordered), step)]
+    counts: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for part in ex.map(functools.partial(_count_blob_lines, local_path), parts):
+            counts.update(part)
+    return counts
+
+
+def _collect_files(local_path: Path, commit: str, previous: Dict[str, dict],
+                   code_exts: frozenset[str]) -> Dict[str, dict]:
+    per_file = {}
+    to_count = set()
+    for rel, sha, size in _list_tree(local_path, commit):
+        if _is_excluded(rel):
+            continue
+        ext = _file_ext(rel.rpartition("/")[2])
+        old = previous.get(rel)
+        # строки пересчитываются только для изменившихся объектов;
+        # lines = None означает, что файл не считался (не был кодом)
+        lines = old["lines"] if old and old.get("sha") == sha else None
+        if lines is None and ext in code_exts:
+            to_count.add(sha)
+        per_file[rel] = {"sha": sha, "size": size, "lines": lines, "ext": ext}
+    if to_count:
+        counts = _count_code_blobs(local_path, to_count)
+        for info in per_file.values():
+            if info["sha"] in counts:
+                info["lines"] = counts[info["sha"]]
+    return per_file
+
+
+def _summarize(per_file: Dict[str, dict], code_exts: frozenset[str]) -> Tuple[int, int, int, int]:
     code_files = 0
-    for root, dirs, files in __import__("os").walk(path):
-        if ".git" in dirs:
-            dirs.remove(".git")
-        for f in files:
-            total += 1
-            if Path(f).suffix.lower() in code_exts:
-                code_files += 1
-    return total, code_files
-
-
-def _lines_of_code(path: Path, code_exts: set[str]) -> int:
-    count = 0
-    for root, dirs, files in __import__("os").walk(path):
-        if ".git" in dirs:
-            dirs.remove(".git")
-        for f in files:
-            if Path(f).suffix.lower() in code_exts:
-                p = Path(root) / f
-                with p.open("r", encoding="utf-8", errors="ignore") as fh:
-                    for _ in fh:
-                        count += 1
-    return count
+    size_bytes = 0
+    total_lines = 0
+    for info in per_file.values():
+        size_bytes += info["size"]
+        if info["ext"] in code_exts:
+            code_files += 1
+            total_lines += info["lines"] or 0
+    return len(per_file), code_files, size_bytes, total_lines
+
+
+# Кэш в памяти поверх файлового: у каждого процесса (например, воркера gunicorn)
+# он свой, источником истины остаются файлы в REPO_CACHES. В памяти хранятся
+# только commit, etag и stats, список файлов читается с диска при пересчёте.
+# Запись сверяется с mtime файла, поэтому обновления других воркеров не теряются.
+MEM_CACHE_SIZE = 256
+_MEM_CACHE: "OrderedDict[Path, Tuple[int, dict]]" = OrderedDict()
+_MEM_CACHE_LOCK = threading.Lock()
+
+
+def _json_loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data)
+
 
+def _json_dumps(obj) -> bytes:
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=1024)
 def _cache_path_for(repo_url: str, cache_dir: Path) -> Path:
     safe = repo_url.replace("/", "_").replace(":", "_")
     return cache_dir / f"{safe}.json"
@@ -103,45 +319,143 @@ def _cache_path_for(repo_url: str, cache_dir: Path) -> Path:
 
 def _load_cached_stats(repo_url: str, cache_dir: Path) -> Optional[dict]:
     p = _cache_path_for(repo_url, cache_dir)
-    if not p.exists():
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _MEM_CACHE_LOCK:
+        entry = _MEM_CACHE.get(p)
+        if entry is not None and entry[0] == mtime_ns:
+            _MEM_CACHE.move_to_end(p)
+            return entry[1]
+    try:
+        data = _json_loads(p.read_bytes())
+    except (OSError, ValueError):
         return None
-    return json.loads(p.read_text(encoding="utf-8"))
+    # кэш старого формата без коммита и списка файлов не используется
+    if not isinstance(data, dict) or not {"commit", "stats", "per_file"} <= data.keys():
+        return None
+    record = {"commit": data["commit"], "etag": data.get("etag"), "stats": data["stats"]}
+    _remember_cached_stats(p, record, mtime_ns)
+    return record
 
 
-def _save_cached_stats(repo_url: str, cache_dir: Path, stats: dict) -> None:
-    cache_dir.mkdir(parents=True, exist_ok=True)
+def _load_cached_files(repo_url: str, cache_dir: Path) -> Dict[str, dict]:
+    try:
+        data = _json_loads(_cache_path_for(repo_url, cache_dir).read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return data.get("per_file", {})
+
+
+def _remember_cached_stats(p: Path, data: dict, mtime_ns: int) -> None:
+    with _MEM_CACHE_LOCK:
+        _MEM_CACHE[p] = (mtime_ns, data)
+        _MEM_CACHE.move_to_end(p)
+        if len(_MEM_CACHE) > MEM_CACHE_SIZE:
+            _MEM_CACHE.popitem(last=False)
+
+
+def _cache_age(repo_url: str, cache_dir: Path) -> Optional[float]:
+    try:
+        return time.time() - _cache_path_for(repo_url, cache_dir).stat().st_mtime
+    except OSError:
+        return None
+
+
+def _touch_cached_stats(repo_url: str, cache_dir: Path, record: dict) -> None:
     p = _cache_path_for(repo_url, cache_dir)
-    p.write_text(json.dumps(stats, ensure_ascii=False), encoding="utf-8")
+    now = time.time_ns()
+    try:
+        os.utime(p, ns=(now, now))
+        _remember_cached_stats(p, record, now)
+    except OSError:
+        # файл удалён, а запись осталась только в памяти
+        _save_cached_stats(repo_url, cache_dir, record, {})
+
 
-DEFAULT_CODE_EXTS = {
+def _save_cached_stats(repo_url: str, cache_dir: Path, record: dict, per_file: Dict[str, dict]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    p = _cache_path_for(repo_url, cache_dir)
+    # запись во временный файл и os.replace: читатели не увидят файл наполовину
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=p.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_json_dumps({**record, "per_file": per_file}))
+            mtime_ns = os.fstat(fh.fileno()).st_mtime_ns
+        os.replace(tmp, p)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    _remember_cached_stats(p, record, mtime_ns)
+
+DEFAULT_CODE_EXTS = frozenset({
     ".py", ".js", ".ts", ".go", ".rs", ".java", ".c", ".cpp", ".h", ".hpp", ".md", ".html", ".css", ".rb", ".php"
-}
+})
+
+
+def is_supported_repo(repo_url: str) -> bool:
+    return _repo_parts(repo_url) is not None
+
+
+def get_cached_stats(repo_url: str, config) -> Optional[dict]:
+    """
+    Возвращает последнюю сохранённую статистику репозитория без обращения
+    к сети, даже если она могла устареть.
+    """
+    cached = _load_cached_stats(repo_url, Path(config.REPO_CACHES))
+    return cached["stats"] if cached else None
 
 
 def get_stats(repo_url: str, config, code_exts: Optional[set[str]] = None) -> Optional[dict]:
-    code_exts = code_exts or DEFAULT_CODE_EXTS
+    """
+    Собирает статистику репозитория. Скрытые каталоги (начинающиеся с точки),
+    а также каталоги зависимостей и сборки из EXCLUDED_DIRS не учитываются.
+    """
+    code_exts = frozenset(ext.lower() for ext in code_exts) if code_exts else DEFAULT_CODE_EXTS
     parts = _repo_parts(repo_url)
     if parts is None:
         return None
 
-    repo_name = repo_url.rstrip("/").split("/")[-1].replace(".git", "")
-    local_path = Path(config.REPO_FOLDER) / repo_name
+    local_path = _local_repo_path(repo_url, config)
+
+    cache_dir = Path(config.REPO_CACHES)
+    cached = _load_cached_stats(repo_url, cache_dir)
+    if cached:
+        # недавно проверенный кэш отдаётся без обращения к GitHub
+        age = _cache_age(repo_url, cache_dir)
+        if age is not None and age < config.REMOTE_CHECK_TTL:
+            return cached["stats"]
 
-    remote_sha = _get_remote_commit(repo_url)
-    if remote_sha is None:
+    # если репозиторий уже известен, fetch запускается одновременно с запросом к API;
+    # для нового URL сначала проверяется, что репозиторий существует
+    fetch = _EXECUTOR.submit(_clone_or_fetch, repo_url, local_path) if cached else None
+
+    remote = _get_remote_commit(repo_url, cached.get("etag") if cached else None,
+                                cached["commit"] if cached else None)
+    if remote is None:
         return None
+    remote_sha, etag = remote
 
-    cached = _load_cached_stats(repo_url, Path(config.REPO_CACHES))
-    if cached and cached.get("commit") == remote_sha:
-        return cached
+    if cached and cached["commit"] == remote_sha:
+        if etag != cached.get("etag"):
+            _save_cached_stats(repo_url, cache_dir, {**cached, "etag": etag},
+                               _load_cached_files(repo_url, cache_dir))
+        else:
+            _touch_cached_stats(repo_url, cache_dir, cached)
+        return cached["stats"]
 
     # ensure repo present and up-to-date
-    _clone_or_fetch(repo_url, local_path)
+    if fetch is not None:
+        fetch.result()
+    else:
+        _clone_or_fetch(repo_url, local_path)
     local_sha = _local_commit(local_path)
 
-    total_files, code_files = _file_counts(local_path, code_exts)
-    total_lines = _lines_of_code(local_path, code_exts)
-    size_bytes = _repo_size_bytes(local_path)
+    previous = _load_cached_files(repo_url, cache_dir) if cached else {}
+    per_file = _collect_files(local_path, local_sha, previous, code_exts)
+
+    total_files, code_files, size_bytes, total_lines = _summarize(per_file, code_exts)
 
     stats = {
         "Коммит": remote_sha,
@@ -152,59 +466,65 @@ def get_stats(repo_url: str, config, code_exts: Optional[set[str]] = None) -> Op
         "Строк кода": total_lines,
     }
 
-    _save_cached_stats(repo_url, Path(config.REPO_CACHES), stats)
+    _save_cached_stats(repo_url, cache_dir, {
+        "commit": remote_sha,
+        "etag": etag,
+        "stats": stats,
+    }, per_file)
     return stats
 
 
-def render_image(stats):
-    from PIL import Image, ImageDraw, ImageFont
-    import io
-    
-    try:
-        font = ImageFont.truetype("assets/font.ttf", 20)
-    except:
-        font = ImageFont.load_default()
+try:
+    _FONT = ImageFont.truetype("assets/font.ttf", 20)
+except OSError:
+    _FONT = ImageFont.load_default()
 
-    draw_temp = ImageDraw.Draw(Image.new('RGB', (1, 1)))
-    line_height = 40
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('RGB', (1, 1)))
 
-    height = 80
 
-    for key, value in stats.items():
-        text = f"{key}: {value}"
-        text_width = draw_temp.textbbox((0, 0), text, font=font)[2]
-        if text_width > 440:
-            height += line_height * 2
-        else:
-            height += line_height
-    
+@functools.lru_cache(maxsize=128)
+def _text_bbox(text: str) -> Tuple[int, int, int, int]:
+    return _MEASURE_DRAW.textbbox((0, 0), text, font=_FONT)
+
+
+@functools.lru_cache(maxsize=128)
+def _text_length(text: str) -> float:
+    return _MEASURE_DRAW.textlength(text, font=_FONT)
+
+
+@functools.lru_cache(maxsize=8)
+def _blank(width: int, height: int) -> Image.Image:
+    return Image.new('RGB', (width, height), color='black')
+
+
+def render_image(stats):
+    font = _FONT
+    line_height = 40
     width = 500
-    img = Image.new('RGB', (width, height), color='black')
+
+    # измерение строк выполняется один раз и используется и для высоты, и для отрисовки
+    rows = [(key, value, _text_bbox(f"{key}: {value}")[2] > 440) for key, value in stats.items()]
+    height = 80 + sum(line_height * (2 if wrap else 1) for _, _, wrap in rows)
+
+    # высота кратна line_height, поэтому фоны разных запросов обычно совпадают
+    img = _blank(width, height).copy()
     draw = ImageDraw.Draw(img)
     draw.text((width // 2, 30), "СТАТИСТИКА", fill='red', font=font, anchor="mm")
     y_offset = 70
-    for key, value in stats.items():
-        text = f"{key}: {value}"
-        text_width = draw.textbbox((0, 0), text, font=font)[2]
-        
-        if text_width > 440:
-            key_text = f"{key}:"
-            draw.text((30, y_offset), key_text, fill='yellow', font=font)
+    for key, value, wrap in rows:
+        key_text = f"{key}:"
+        draw.text((30, y_offset), key_text, fill='yellow', font=font)
+
+        if wrap:
             draw.text((30, y_offset + 25), str(value), fill='white', font=font)
-            
             y_offset += line_height * 2
         else:
-            colon_pos = len(f"{key}:")
-            full_text = f"{key}: {value}"
-            draw.text((30, y_offset), full_text[:colon_pos], fill='yellow', font=font)
-            key_bbox = draw.textbbox((30, y_offset), full_text[:colon_pos], font=font)
-            key_width = key_bbox[2] - key_bbox[0]
-            draw.text((30 + key_width, y_offset), full_text[colon_pos:], fill='white', font=font)
-            
+            draw.text((30 + _text_length(key_text), y_offset), f" {value}", fill='white', font=font)
             y_offset += line_height
 
     img_buffer = io.BytesIO()
-    img.save(img_buffer, format='PNG')
+    # карточка маленькая, поэтому сжатие выбирается по скорости, а не по размеру
+    img.save(img_buffer, format='PNG', compress_level=1, optimize=False)
     img_buffer.seek(0)
     
     return img_buffer
\ No newline at end of file